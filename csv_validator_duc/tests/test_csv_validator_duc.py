@@ -0,0 +1,34 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tools"))
+
+import csv_validator_duc  # noqa: E402
+
+HEADER = b"name,salary,address,gpa,school\n"
+
+
+@pytest.mark.parametrize("content", [
+    # Short row: the C engine pads it, pyarrow alone would reject it
+    HEADER + b"a,1,x,3,s\nb,2,y,2\n",
+    # Well-formed
+    HEADER + b"a,1,x,3,s\nb,2,y,2,t\n",
+    # Blank text cell
+    HEADER + b"a,1,x,3,s\n ,2,y,2,t\n",
+])
+def test_engines_agree(monkeypatch, content):
+    monkeypatch.setattr(csv_validator_duc, "PYARROW_MIN_BYTES", sys.maxsize)
+    c_result = csv_validator_duc._validate(csv_validator_duc._read_csv(content))
+    monkeypatch.setattr(csv_validator_duc, "PYARROW_MIN_BYTES", 0)
+    pyarrow_result = csv_validator_duc._validate(csv_validator_duc._read_csv(content))
+    assert pyarrow_result == c_result
+
+
+def test_short_row_reports_empty_column(monkeypatch):
+    monkeypatch.setattr(csv_validator_duc, "PYARROW_MIN_BYTES", 0)
+    content = HEADER + b"a,1,x,3,s\nb,2,y,2\n"
+    assert csv_validator_duc._validate(csv_validator_duc._read_csv(content)) == (
+        False, "School column contains empty values (row 2)"
+    )
@@ -1,6 +1,10 @@
+from __future__ import annotations
+
+from collections import OrderedDict
 from collections.abc import Generator
-from typing import Any
-import pandas as pd
+from typing import TYPE_CHECKING, Any
+import hashlib
+import threading
 import json
 from io import BytesIO
 
@@ -8,63 +12,138 @@ from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
 from dify_plugin.file.file import File
 
+if TYPE_CHECKING:
+    # pandas (and numpy with it) is imported lazily on first validation to keep
+    # plugin start-up light
+    import numpy as np
+    import pandas as pd
+
+# Required columns in the order missing ones are reported
+REQUIRED_COLUMNS = ('name', 'salary', 'address', 'gpa', 'school')
+# Text columns in the order their empty-value errors are reported
+TEXT_COLUMNS = ['name', 'school', 'address']
+# pandas >= 3 backs str columns with pyarrow storage, so their .str methods
+# run as Arrow compute kernels
+TEXT_DTYPES = dict.fromkeys(TEXT_COLUMNS, str)
+
+# Files at least this large are parsed with the multithreaded pyarrow engine;
+# below it the C engine wins because pyarrow's setup cost dominates
+PYARROW_MIN_BYTES = 1_000_000
+
+# Validation results of recently seen files, keyed by content digest and size
+RESULT_CACHE_SIZE = 32
+_result_cache: OrderedDict[tuple[bytes, int], tuple[bool, str]] = OrderedDict()
+_result_cache_lock = threading.Lock()
+
+
+def _first_row(mask: pd.Series | np.ndarray) -> int:
+    """Return the 1-based data row number of the first True value in mask."""
+    return int(mask.argmax()) + 1
+
+
+def _read_csv(csv_content: bytes) -> pd.DataFrame:
+    """Parse raw CSV bytes with the engine best suited to their size."""
+    import pandas as pd
+
+    if len(csv_content) >= PYARROW_MIN_BYTES:
+        try:
+            return pd.read_csv(BytesIO(csv_content), dtype=TEXT_DTYPES, engine='pyarrow')
+        except pd.errors.ParserError:
+            # pyarrow rejects rows the C engine accepts (short rows are padded
+            # with NaN); re-read those with the C engine so the result does not
+            # depend on the file size
+            pass
+    return pd.read_csv(BytesIO(csv_content), dtype=TEXT_DTYPES, engine='c')
+
+
+def _validate(df: pd.DataFrame) -> tuple[bool, str]:
+    """Validate a parsed CSV and return (valid, message)."""
+    import pandas as pd
+
+    # Checks are ordered cheapest first and must stay that way: the shape and
+    # header checks below are O(1) or O(columns) and run before anything that
+    # scans cell values, so a malformed file is rejected without touching rows.
+
+    # df.empty covers both "no columns" and "header but no data rows"
+    if df.empty:
+        return False, "CSV file is empty"
+
+    missing_cols = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing_cols:
+        return False, f"Missing required columns: {', '.join(missing_cols)}"
+
+    # Per-column non-null counts avoid materialising a rows x columns null mask
+    if df.count().eq(0).any():
+        return False, "Some columns contain only null values"
+
+    # Validate salary
+    salary = pd.to_numeric(df['salary'], errors='coerce')
+    if (bad := salary.isnull()).any():
+        return False, f"Salary column contains non-numeric values (row {_first_row(bad)})"
+    # Range checks reduce to min/max; the row mask is only built on failure
+    if salary.min() <= 0:
+        return False, f"Salary must be greater than 0 (row {_first_row(salary <= 0)})"
+
+    # Validate GPA
+    gpa = pd.to_numeric(df['gpa'], errors='coerce')
+    if (bad := gpa.isnull()).any():
+        return False, f"GPA column contains non-numeric values (row {_first_row(bad)})"
+    if gpa.min() < 0 or gpa.max() > 4:
+        return False, f"GPA must be between 0 and 4 (row {_first_row((gpa < 0) | (gpa > 4))})"
+
+    # Check all text columns for null/blank cells in a single fused pass:
+    # nulls become '' so one test per cell covers both cases. isspace() is
+    # False for '', hence the length check; neither allocates stripped copies.
+    empty = (
+        df[TEXT_COLUMNS].fillna('')
+        .apply(lambda s: s.str.len().eq(0) | s.str.isspace())
+        .to_numpy()
+    )
+    empty_cols = empty.any(axis=0)
+    if empty_cols.any():
+        col_index = int(empty_cols.argmax())
+        col = TEXT_COLUMNS[col_index]
+        return False, f"{col.capitalize()} column contains empty values (row {_first_row(empty[:, col_index])})"
+
+    return True, f"CSV is valid. Contains {len(df)} rows and {len(df.columns)} columns"
+
+
+def _validate_content(csv_content: bytes) -> tuple[bool, str]:
+    """Validate raw CSV bytes, reusing the result for recently validated identical files."""
+    key = (hashlib.blake2b(csv_content, digest_size=16).digest(), len(csv_content))
+    with _result_cache_lock:
+        if key in _result_cache:
+            _result_cache.move_to_end(key)
+            return _result_cache[key]
+
+    # Read errors propagate to the caller and are not cached
+    result = _validate(_read_csv(csv_content))
+
+    with _result_cache_lock:
+        _result_cache[key] = result
+        if len(_result_cache) > RESULT_CACHE_SIZE:
+            _result_cache.popitem(last=False)
+    return result
+
+
 class CsvValidatorDucTool(Tool):
     def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage]:
         valid = "false"
         message = "CSV validation failed"
-        
+
         try:
             # Get CSV file from parameters
             csv_file: File = tool_parameters.get("csv_file")
-            
+
             if not csv_file:
                 message = "CSV file not provided"
-            elif csv_file:
-                # Read CSV file
-                csv_content = csv_file.blob
-                df = pd.read_csv(BytesIO(csv_content))
-                
-                # Validation checks
-                if df.empty:
-                    message = "CSV file is empty"
-                elif len(df.columns) == 0:
-                    message = "CSV has no columns"
-                elif len(df) == 0:
-                    message = "CSV has no data rows"
-                else:
-                    required_columns = ['name', 'salary', 'address', 'gpa', 'school']
-                    missing_cols = [col for col in required_columns if col not in df.columns]
-                    
-                    if missing_cols:
-                        message = f"Missing required columns: {', '.join(missing_cols)}"
-                    elif df.isnull().all().any():
-                        message = "Some columns contain only null values"
-                    else:
-                        # Validate salary
-                        salary = pd.to_numeric(df['salary'], errors='coerce')
-                        if salary.isnull().any():
-                            message = "Salary column contains non-numeric values"
-                        elif (salary <= 0).any():
-                            message = "Salary must be greater than 0"
-                        else:
-                            # Validate GPA
-                            gpa = pd.to_numeric(df['gpa'], errors='coerce')
-                            if gpa.isnull().any():
-                                message = "GPA column contains non-numeric values"
-                            elif ((gpa < 0) | (gpa > 4)).any():
-                                message = "GPA must be between 0 and 4"
-                            elif df['name'].isnull().any() or df['name'].str.strip().eq('').any():
-                                message = "Name column contains empty values"
-                            elif df['school'].isnull().any() or df['school'].str.strip().eq('').any():
-                                message = "School column contains empty values"
-                            elif df['address'].isnull().any() or df['address'].str.strip().eq('').any():
-                                message = "Address column contains empty values"
-                            else:
-                                valid = "true"
-                                message = f"CSV is valid. Contains {len(df)} rows and {len(df.columns)} columns"
+            else:
+                is_valid, message = _validate_content(csv_file.blob)
+                if is_valid:
+                    valid = "true"
         except Exception as e:
             message = f"Error reading CSV: {str(e)}"
-        
+
         # Return text message for display
         yield self.create_text_message(message)
         # Return valid variable for workflow logic
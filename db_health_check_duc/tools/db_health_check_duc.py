@@ -1,10 +1,127 @@
+from collections import OrderedDict
 from collections.abc import Generator
 from typing import Any
+import hashlib
+import socket
+import threading
 import psycopg2
+from psycopg2.extensions import connection
+from psycopg2.pool import PoolError, ThreadedConnectionPool
 
 from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
 
+# Connection pools shared across invocations, keyed by a digest of the
+# connection parameters. Idle pools beyond the MAX_POOLS most recently used are
+# closed, and each pool keeps at most one idle connection.
+MAX_POOLS = 8
+_pools: OrderedDict[bytes, ThreadedConnectionPool] = OrderedDict()
+_pools_lock = threading.Lock()
+
+
+def _evict_idle_pools() -> None:
+    """Close the least recently used pools beyond MAX_POOLS; the caller holds _pools_lock."""
+    # The newest pool is never evicted, and pools with connections still
+    # borrowed are left for a later call so no statement loses its connection
+    for key in list(_pools)[:-1]:
+        if len(_pools) <= MAX_POOLS:
+            break
+        pool = _pools[key]
+        # Holding the pool's own lock keeps getconn() from lending a
+        # connection between the check and the close
+        with pool._lock:
+            if pool._used:
+                continue
+            pool._closeall()
+        del _pools[key]
+
+
+def _get_pool(host: str, port: int, dbname: str, user: str, password: str) -> ThreadedConnectionPool:
+    """Return the pool for these credentials, creating it on first use."""
+    key = hashlib.sha256(repr((host, port, dbname, user, password)).encode()).digest()
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is not None:
+            _pools.move_to_end(key)
+            return pool
+
+    # The first connection is opened here, outside the lock so a slow host does
+    # not hold up everyone else; bad credentials fail fast and no pool is kept
+    pool = ThreadedConnectionPool(
+        minconn=1,
+        maxconn=8,
+        host=host,
+        port=port,
+        dbname=dbname,
+        user=user,
+        password=password,
+        connect_timeout=5
+    )
+    with _pools_lock:
+        existing = _pools.get(key)
+        if existing is None:
+            _pools[key] = pool
+            _evict_idle_pools()
+            return pool
+        _pools.move_to_end(key)
+    # Another call created a pool for the same credentials meanwhile
+    pool.closeall()
+    return existing
+
+
+def _connect(
+    host: str, port: int, dbname: str, user: str, password: str
+) -> tuple[ThreadedConnectionPool | None, connection]:
+    """Borrow a connection for these credentials; the pool is None for a dedicated one."""
+    pool = _get_pool(host, port, dbname, user, password)
+    try:
+        return pool, pool.getconn()
+    except PoolError:
+        # Every pooled connection is busy (or the pool was just evicted), so
+        # open one outside the pool rather than fail
+        return None, psycopg2.connect(
+            host=host, port=port, dbname=dbname, user=user, password=password, connect_timeout=5
+        )
+
+
+def _release(pool: ThreadedConnectionPool | None, conn: connection, close: bool = False) -> None:
+    """Return a borrowed connection to its pool, or close it if it has none."""
+    if pool is not None:
+        try:
+            # The pool rolls back an unfinished transaction and discards a
+            # connection whose server link was lost
+            pool.putconn(conn, close=close)
+            return
+        except PoolError:
+            # The pool is closed; busy pools are not evicted, but close the
+            # connection rather than leak it
+            pass
+    conn.close()
+
+
+def _ping(host: str, port: int, dbname: str, user: str, password: str) -> None:
+    """Run SELECT 1 on a pooled connection, retrying once if it had gone stale."""
+    for attempt in range(2):
+        pool, conn = _connect(host, port, dbname, user, password)
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            # Drop the broken connection instead of returning it to the pool
+            _release(pool, conn, close=True)
+            if attempt:
+                raise
+        else:
+            _release(pool, conn)
+            return
+
+
+def _probe_tcp(host: str, port: int) -> None:
+    """Check that the server port accepts TCP connections, without logging in."""
+    with socket.create_connection((host, port), timeout=2):
+        pass
+
+
 class DbHealthCheckDucTool(Tool):
     def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage]:
         result = "false"
@@ -14,24 +131,23 @@ class DbHealthCheckDucTool(Tool):
         dbname = tool_parameters.get("dbname")
         user = tool_parameters.get("user")
         password = tool_parameters.get("password")
-        
+        # "auth" logs in and runs SELECT 1; "tcp" only checks the port is open
+        mode = tool_parameters.get("mode") or "auth"
+
         try:
             port = int(port) if port else 5432
-            
-            # Test connection
-            conn = psycopg2.connect(
-                host=host,
-                port=port,
-                dbname=dbname,
-                user=user,
-                password=password
-            )
-            conn.close()
+
+            if mode == "tcp":
+                _probe_tcp(host, port)
+                message = f"Database port reachable. {host}:{port} is accepting connections"
+            else:
+                # Test connection
+                _ping(host, port, dbname, user, password)
+                message = f"Database connection successful. Connected to {dbname} on {host}:{port}"
             result = "true"
-            message = f"Database connection successful. Connected to {dbname} on {host}:{port}"
         except Exception as e:
             message = f"Database connection failed: {str(e)}"
-        
+
         # Return text message for display
         yield self.create_text_message(message)
         # Return health status and credentials as object for next step
@@ -1,15 +1,192 @@
-from collections.abc import Generator
+from collections import OrderedDict
+from collections.abc import Generator, Iterator
 from typing import Any
+import csv
+import hashlib
+import io
+import threading
+import requests
 import psycopg2
-import pandas as pd
-from io import BytesIO
+from psycopg2 import sql
+from psycopg2.extensions import connection
+from psycopg2.pool import PoolError, ThreadedConnectionPool
 
 from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
 from dify_plugin.file.file import File
 
+# Approximate characters of CSV sent per COPY data message
+COPY_BUFFER_SIZE = 64 * 1024
+# Seconds to wait for the file server to connect or send more data
+DOWNLOAD_TIMEOUT = 30
+
+
+# Connection pools shared across invocations, keyed by a digest of the
+# connection parameters. Idle pools beyond the MAX_POOLS most recently used are
+# closed, and each pool keeps at most one idle connection.
+MAX_POOLS = 8
+_pools: OrderedDict[bytes, ThreadedConnectionPool] = OrderedDict()
+_pools_lock = threading.Lock()
+
+
+def _evict_idle_pools() -> None:
+    """Close the least recently used pools beyond MAX_POOLS; the caller holds _pools_lock."""
+    # The newest pool is never evicted, and pools with connections still
+    # borrowed are left for a later call so no statement loses its connection
+    for key in list(_pools)[:-1]:
+        if len(_pools) <= MAX_POOLS:
+            break
+        pool = _pools[key]
+        # Holding the pool's own lock keeps getconn() from lending a
+        # connection between the check and the close
+        with pool._lock:
+            if pool._used:
+                continue
+            pool._closeall()
+        del _pools[key]
+
+
+def _get_pool(host: str, port: int, dbname: str, user: str, password: str) -> ThreadedConnectionPool:
+    """Return the pool for these credentials, creating it on first use."""
+    key = hashlib.sha256(repr((host, port, dbname, user, password)).encode()).digest()
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is not None:
+            _pools.move_to_end(key)
+            return pool
+
+    # The first connection is opened here, outside the lock so a slow host does
+    # not hold up everyone else; bad credentials fail fast and no pool is kept
+    pool = ThreadedConnectionPool(
+        minconn=1,
+        maxconn=8,
+        host=host,
+        port=port,
+        dbname=dbname,
+        user=user,
+        password=password,
+        connect_timeout=5
+    )
+    with _pools_lock:
+        existing = _pools.get(key)
+        if existing is None:
+            _pools[key] = pool
+            _evict_idle_pools()
+            return pool
+        _pools.move_to_end(key)
+    # Another call created a pool for the same credentials meanwhile
+    pool.closeall()
+    return existing
+
+
+def _connect(
+    host: str, port: int, dbname: str, user: str, password: str
+) -> tuple[ThreadedConnectionPool | None, connection]:
+    """Borrow a connection for these credentials; the pool is None for a dedicated one."""
+    pool = _get_pool(host, port, dbname, user, password)
+    try:
+        return pool, pool.getconn()
+    except PoolError:
+        # Every pooled connection is busy (or the pool was just evicted), so
+        # open one outside the pool rather than fail
+        return None, psycopg2.connect(
+            host=host, port=port, dbname=dbname, user=user, password=password, connect_timeout=5
+        )
+
+
+def _release(pool: ThreadedConnectionPool | None, conn: connection, close: bool = False) -> None:
+    """Return a borrowed connection to its pool, or close it if it has none."""
+    if pool is not None:
+        try:
+            # The pool rolls back an unfinished transaction and discards a
+            # connection whose server link was lost
+            pool.putconn(conn, close=close)
+            return
+        except PoolError:
+            # The pool is closed; busy pools are not evicted, but close the
+            # connection rather than leak it
+            pass
+    conn.close()
+
+
+class _CopyRows:
+    """
+    File-like object feeding parsed CSV rows to COPY, re-encoded as UTF-8 CSV.
+
+    Blank lines are skipped and short rows padded with empty fields, as
+    pd.read_csv did; COPY would reject both. Rows with more fields than the
+    header raise ValueError.
+    """
+
+    def __init__(self, reader: Iterator[list[str]], width: int):
+        self._reader = reader
+        self._width = width
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator="\n")
+
+    def read(self, size: int = -1) -> bytes:
+        for row in self._reader:
+            if not row:
+                continue
+            if len(row) > self._width:
+                raise ValueError(
+                    f"Expected {self._width} fields in line {self._reader.line_num}, saw {len(row)}"
+                )
+            if len(row) < self._width:
+                row += [""] * (self._width - len(row))
+            self._writer.writerow(row)
+            if 0 < size <= self._buffer.tell():
+                break
+        data = self._buffer.getvalue().encode("utf-8")
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+
+def _ensure_schema(conn, column_defs: sql.Composable, columns: list[str]) -> None:
+    """Create the employee table and its dedup index, once, in their own transaction."""
+    with conn.cursor() as cursor:
+        # Checking first keeps the ingest itself free of DDL: CREATE INDEX takes a
+        # SHARE lock on the table until commit (deadlocking concurrent ingests,
+        # whose INSERTs need ROW EXCLUSIVE) and requires table ownership even
+        # when the index already exists
+        cursor.execute("SELECT to_regclass('employee_uniq') IS NULL")
+        if not cursor.fetchone()[0]:
+            conn.commit()
+            return
+
+        try:
+            cursor.execute(sql.SQL("CREATE TABLE IF NOT EXISTS employee ({})").format(column_defs))
+            # The index is over one digest per row rather than the raw columns,
+            # which a btree could not hold for rows over about 2.7 KB. Each value
+            # is quoted so the join is unambiguous; quote_literal() is NULL for
+            # NULL, so, as before, rows containing NULLs never conflict.
+            row_key = sql.SQL(" || ',' || ").join(
+                sql.SQL("quote_literal({})").format(sql.Identifier(col)) for col in columns
+            )
+            cursor.execute(
+                sql.SQL("CREATE UNIQUE INDEX IF NOT EXISTS employee_uniq ON employee ((md5({})))").format(row_key)
+            )
+            conn.commit()
+        except (psycopg2.errors.UniqueViolation, psycopg2.errors.DuplicateTable):
+            # Either another ingest created them at the same moment, or the
+            # table already holds duplicate rows and the index cannot be built;
+            # without the index ON CONFLICT would silently stop deduplicating
+            conn.rollback()
+            cursor.execute("SELECT to_regclass('employee_uniq') IS NULL")
+            missing = cursor.fetchone()[0]
+            conn.commit()
+            if missing:
+                raise ValueError(
+                    "Existing duplicate rows in employee prevent creating the employee_uniq index; "
+                    "remove them before ingesting"
+                )
+
+
 class IngestionPluginDucTool(Tool):
     def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage]:
+        response = None
+        pool = conn = None
         try:
             csv_file = tool_parameters.get("csv_file")
             
@@ -21,62 +198,74 @@ class IngestionPluginDucTool(Tool):
             user = db_config.get("user")
             password = db_config.get("password")
             
-            csv_content = csv_file.blob
-            df = pd.read_csv(BytesIO(csv_content))
+            # Stream the file from its URL rather than loading csv_file.blob, so
+            # the server ingests rows while the download is still in progress
+            # and the raw file is never held in memory as a whole
+            response = requests.get(csv_file.url, stream=True, timeout=DOWNLOAD_TIMEOUT)
+            response.raise_for_status()
+            response.raw.decode_content = True
+            # Keep the body open at EOF so the text wrapper can see the end
+            response.raw.auto_close = False
             
-            # Connect to database
-            conn = psycopg2.connect(
-                host=host,
-                port=port,
-                dbname=dbname,
-                user=user,
-                password=password
-            )
-            cursor = conn.cursor()
+            # Rows are parsed as they arrive, so quoted fields may span lines.
+            # utf-8-sig drops a leading byte order mark from the first column name.
+            reader = csv.reader(io.TextIOWrapper(response.raw, encoding='utf-8-sig', newline=''))
+            columns = next((row for row in reader if row), None)
+            if not columns:
+                raise ValueError("No columns to parse from file")
+            
+            # Column names come from the file, so they are quoted as identifiers
+            # rather than pasted into the statements
+            column_names = sql.SQL(', ').join(map(sql.Identifier, columns))
+            column_defs = sql.SQL(', ').join(sql.SQL('{} TEXT').format(sql.Identifier(col)) for col in columns)
             
-            # Create table if not exists
-            columns = []
-            for col in df.columns:
-                columns.append(f'"{col}" TEXT')
+            for attempt in range(2):
+                # Borrow a connection from the pool for these credentials
+                pool, conn = _connect(host, port, dbname, user, password)
+                try:
+                    # Create the table and its unique index if missing; the index
+                    # lets the server skip rows that already exist, so no per-row
+                    # existence check is needed
+                    _ensure_schema(conn, column_defs, columns)
+                    break
+                except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                    # Retry once if a pooled connection had gone stale; nothing
+                    # has been read past the header yet
+                    if attempt or not conn.closed:
+                        raise
+                    _release(pool, conn)
+                    conn = None
+            cursor = conn.cursor()
             
-            create_table_query = f"""
-            CREATE TABLE IF NOT EXISTS employee (
-                {', '.join(columns)}
+            # COPY cannot skip conflicting rows, so stream the data into a
+            # transaction-scoped staging table first. Empty fields, quoted or
+            # not, are loaded as NULL.
+            cursor.execute(sql.SQL("CREATE TEMP TABLE employee_stage ({}) ON COMMIT DROP").format(column_defs))
+            cursor.copy_expert(
+                sql.SQL(
+                    "COPY employee_stage ({columns}) FROM STDIN "
+                    "WITH (FORMAT csv, FORCE_NULL ({columns}), ENCODING 'UTF8')"
+                ).format(columns=column_names),
+                _CopyRows(reader, len(columns)),
+                size=COPY_BUFFER_SIZE
             )
-            """
-            cursor.execute(create_table_query)
             
-            # Insert data
-            total_rows = len(df)
-            rows_inserted = 0
-            rows_skipped = 0
-            for _, row in df.iterrows():
-                values = [str(v) if pd.notna(v) else None for v in row]
-                
-                # Check if row already exists before inserting
-                where_conditions = []
-                check_values = []
-                for i, col in enumerate(df.columns):
-                    where_conditions.append(f'"{col}" = %s')
-                    check_values.append(values[i])
-                
-                where_clause = ' AND '.join(where_conditions)
-                check_query = f'SELECT 1 FROM employee WHERE {where_clause}'
-                
-                cursor.execute(check_query, check_values)
-                if cursor.fetchone() is None:
-                    # Row doesn't exist, so insert it
-                    placeholders = ', '.join(['%s'] * len(values))
-                    column_names = ', '.join([f'"{col}"' for col in df.columns])
-                    insert_query = f'INSERT INTO employee ({column_names}) VALUES ({placeholders})'
-                    cursor.execute(insert_query, values)
-                    rows_inserted += 1
-                else:
-                    rows_skipped += 1
+            # Move staged rows into the table; rows that conflict with the index
+            # are skipped. Both counts come back in the same round trip.
+            cursor.execute(sql.SQL("""
+            WITH inserted AS (
+                INSERT INTO employee ({columns})
+                SELECT {columns} FROM employee_stage
+                ON CONFLICT DO NOTHING
+                RETURNING 1
+            )
+            SELECT (SELECT count(*) FROM employee_stage), (SELECT count(*) FROM inserted)
+            """).format(columns=column_names))
+            total_rows, rows_inserted = cursor.fetchone()
+            rows_skipped = total_rows - rows_inserted
             
             conn.commit()
             cursor.close()
-            conn.close()
 
             if rows_inserted == 0:
                 message = f"Data already exists in database. No new rows inserted (checked {total_rows} rows)."
@@ -89,3 +278,8 @@ class IngestionPluginDucTool(Tool):
             
         except Exception as e:
             yield self.create_text_message(f"Error: {str(e)}")
+        finally:
+            if conn is not None:
+                _release(pool, conn)
+            if response is not None:
+                response.close()
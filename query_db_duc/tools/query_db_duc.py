@@ -1,24 +1,161 @@
+from collections import OrderedDict
 from collections.abc import Generator
 from typing import Any
-import psycopg2
+import hashlib
+import threading
 import json
+import psycopg2
+from psycopg2.extras import RealDictCursor
+from psycopg2.extensions import connection
+from psycopg2.pool import PoolError, ThreadedConnectionPool
 
 from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
 
+# Query inputs starting with one of these are SQL rather than a JSON object
+SQL_PREFIXES = ("SELECT", "WITH")
+
+
+# Connection pools shared across invocations, keyed by a digest of the
+# connection parameters. Idle pools beyond the MAX_POOLS most recently used are
+# closed, and each pool keeps at most one idle connection.
+MAX_POOLS = 8
+_pools: OrderedDict[bytes, ThreadedConnectionPool] = OrderedDict()
+_pools_lock = threading.Lock()
+
+
+def _evict_idle_pools() -> None:
+    """Close the least recently used pools beyond MAX_POOLS; the caller holds _pools_lock."""
+    # The newest pool is never evicted, and pools with connections still
+    # borrowed are left for a later call so no statement loses its connection
+    for key in list(_pools)[:-1]:
+        if len(_pools) <= MAX_POOLS:
+            break
+        pool = _pools[key]
+        # Holding the pool's own lock keeps getconn() from lending a
+        # connection between the check and the close
+        with pool._lock:
+            if pool._used:
+                continue
+            pool._closeall()
+        del _pools[key]
+
+
+def _get_pool(host: str, port: int, dbname: str, user: str, password: str) -> ThreadedConnectionPool:
+    """Return the pool for these credentials, creating it on first use."""
+    key = hashlib.sha256(repr((host, port, dbname, user, password)).encode()).digest()
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is not None:
+            _pools.move_to_end(key)
+            return pool
+
+    # The first connection is opened here, outside the lock so a slow host does
+    # not hold up everyone else; bad credentials fail fast and no pool is kept
+    pool = ThreadedConnectionPool(
+        minconn=1,
+        maxconn=8,
+        host=host,
+        port=port,
+        dbname=dbname,
+        user=user,
+        password=password,
+        connect_timeout=5
+    )
+    with _pools_lock:
+        existing = _pools.get(key)
+        if existing is None:
+            _pools[key] = pool
+            _evict_idle_pools()
+            return pool
+        _pools.move_to_end(key)
+    # Another call created a pool for the same credentials meanwhile
+    pool.closeall()
+    return existing
+
+
+def _connect(
+    host: str, port: int, dbname: str, user: str, password: str
+) -> tuple[ThreadedConnectionPool | None, connection]:
+    """Borrow a connection for these credentials; the pool is None for a dedicated one."""
+    pool = _get_pool(host, port, dbname, user, password)
+    try:
+        return pool, pool.getconn()
+    except PoolError:
+        # Every pooled connection is busy (or the pool was just evicted), so
+        # open one outside the pool rather than fail
+        return None, psycopg2.connect(
+            host=host, port=port, dbname=dbname, user=user, password=password, connect_timeout=5
+        )
+
+
+def _release(pool: ThreadedConnectionPool | None, conn: connection, close: bool = False) -> None:
+    """Return a borrowed connection to its pool, or close it if it has none."""
+    if pool is not None:
+        try:
+            # The pool rolls back an unfinished transaction and discards a
+            # connection whose server link was lost
+            pool.putconn(conn, close=close)
+            return
+        except PoolError:
+            # The pool is closed; busy pools are not evicted, but close the
+            # connection rather than leak it
+            pass
+    conn.close()
+
+
+def _fetch_json_rows(conn, sql_query: str) -> list[dict[str, Any]]:
+    """Fetch the rows of a query as dicts built by Postgres, one json value per row."""
+    # One json value per row rather than json_agg, so the server never builds
+    # the result as a single value (capped at 1 GB). The whole result is still
+    # fetched at once: the caller returns it as one text message anyway.
+    with conn.cursor() as cursor:
+        # The query goes in a CTE so it may start with WITH itself; the newline
+        # keeps a trailing -- comment from swallowing the closing parenthesis
+        cursor.execute(
+            f"WITH result AS (\n{sql_query.strip().rstrip(';')}\n) "
+            "SELECT row_to_json(result.*) FROM result"
+        )
+        # psycopg2 decodes json values, so each row is already a dict
+        return [row for row, in cursor.fetchall()]
+
+
+def _run_query(conn: connection, sql_query: str) -> list[dict[str, Any]]:
+    """Run a query and return its rows as dicts keyed by column name."""
+    try:
+        # Let Postgres turn the rows into JSON objects
+        return _fetch_json_rows(conn, sql_query)
+    except (psycopg2.errors.SyntaxError, psycopg2.errors.FeatureNotSupported):
+        # Statements that cannot be wrapped (SHOW, EXPLAIN, several statements:
+        # syntax errors; data-modifying WITH or DML without RETURNING: feature
+        # not supported) run as written in a fresh transaction. Both are raised
+        # before anything executes; any other error is the query's own and is
+        # not retried.
+        conn.rollback()
+        # RealDictCursor returns each row as a dict keyed by column name
+        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(sql_query)
+            return cursor.fetchall()
+
+
 class QueryDbDucTool(Tool):
     def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage]:
+        pool = conn = None
         try:
             # Get SQL query from LLM node (JSON string with "sql" field)
             query_input = tool_parameters.get("query")
             
-            # Parse JSON from LLM output
-            if isinstance(query_input, str):
-                query_data = json.loads(query_input)
+            if isinstance(query_input, str) and query_input.lstrip()[:6].upper().startswith(SQL_PREFIXES):
+                # Bare SQL statement, nothing to parse
+                sql_query = query_input
             else:
-                query_data = query_input
-            
-            sql_query = query_data.get("sql")
+                # Parse JSON from LLM output
+                if isinstance(query_input, str):
+                    query_data = json.loads(query_input)
+                else:
+                    query_data = query_input
+
+                sql_query = query_data.get("sql")
             
             if not sql_query:
                 yield self.create_text_message("Error: No SQL query provided")
@@ -32,30 +169,19 @@ class QueryDbDucTool(Tool):
             user = db_config.get("user")
             password = db_config.get("password")
             
-            # Connect to database
-            conn = psycopg2.connect(
-                host=host,
-                port=port,
-                dbname=dbname,
-                user=user,
-                password=password
-            )
-            cursor = conn.cursor()
-            
-            # Execute query
-            cursor.execute(sql_query)
-            
-            # Fetch results
-            columns = [desc[0] for desc in cursor.description] if cursor.description else []
-            rows = cursor.fetchall()
-            
-            cursor.close()
-            conn.close()
-            
-            # Convert results to list of dictionaries
-            results = []
-            for row in rows:
-                results.append(dict(zip(columns, row)))
+            for attempt in range(2):
+                # Borrow a connection from the pool for these credentials
+                pool, conn = _connect(host, port, dbname, user, password)
+                try:
+                    results = _run_query(conn, sql_query)
+                    break
+                except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                    # Retry once if a pooled connection had gone stale; the
+                    # query is never committed, so running it again is safe
+                    if attempt or not conn.closed:
+                        raise
+                    _release(pool, conn)
+                    conn = None
             
             # Return results as text
             yield self.create_text_message(json.dumps(results, indent=2, ensure_ascii=False))
@@ -64,3 +190,8 @@ class QueryDbDucTool(Tool):
             yield self.create_text_message(f"Error parsing query JSON: {str(e)}")
         except Exception as e:
             yield self.create_text_message(f"Error executing query: {str(e)}")
+        finally:
+            # Returning the connection rolls back the query's open transaction,
+            # as closing it did before
+            if conn is not None:
+                _release(pool, conn)
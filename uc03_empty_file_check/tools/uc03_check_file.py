@@ -1,8 +1,27 @@
-from collections.abc import Generator
-from typing import Any
+from collections import OrderedDict
+from collections.abc import Generator, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from typing import IO, Any
 from io import BytesIO
-import openpyxl
-import xlrd
+from itertools import chain, filterfalse, islice
+import hashlib
+import os
+import posixpath
+import re
+import sqlite3
+import threading
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+
+try:
+    # calamine parses .xlsx and .xls in native code, much faster than
+    # openpyxl and xlrd; those are kept as the fallback where the wheel is
+    # unavailable, and only imported once a fallback is actually taken
+    from python_calamine import CalamineWorkbook
+except ImportError:
+    CalamineWorkbook = None
 
 from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
@@ -21,14 +40,303 @@ logger.addHandler(plugin_logger_handler)
 NO_FILE_INPUT_PROVIDED_MSG = "ファイルがアップロードされていません。変更を反映するためにファイルをアップロードしてください。"
 FILE_NOT_SUPPORTED_MSG = "アップロードされたファイル形式が正しくありません。Excel形式（.xlsx、.xls）のファイルをアップロードしてください。"
 FILE_EMPTY_MSG = "アップロードされたファイルにデータが含まれていません。適切なデータが入力されたファイルをアップロードしてください。"
-ACCEPTED_FILE_EXTENSIONS = [".xls", ".xlsx"]
+ACCEPTED_FILE_EXTENSIONS = (".xls", ".xlsx")
 # Standard header for Type 1 files
-STANDARD_HEADER = [
+STANDARD_HEADER = (
     "検査種別(部位)", "御指摘内容", "立会", "顧客", "製品", "編成", "処置",
     "不良ｺｰﾄﾞ", "不良分類", "修正分類", "切粉寸法", "個数", "多数粉フラグ",
     "配電盤フラグ", "作業組", "実際の作業組", "運送情報", "",
     "要約", "カウント"
-]
+)
+
+# Results of recently checked files, keyed by extension, content digest and
+# size; UC03_CACHE_ENTRIES sets how many are kept (0 disables the cache)
+RESULT_CACHE_SIZE = int(os.environ.get("UC03_CACHE_ENTRIES", "128"))
+_result_cache: OrderedDict[tuple[str, bytes, int], bool] = OrderedDict()
+_result_cache_lock = threading.Lock()
+
+# Optional SQLite file that keeps results across restarts and is shared by
+# worker processes; set UC03_CACHE_DB to its path to enable it
+CACHE_DB_PATH = os.environ.get("UC03_CACHE_DB")
+# Entries older than this are purged when a process opens the database
+CACHE_DB_MAX_AGE = 30 * 24 * 3600
+# Layout of the database; a file with an older layout is emptied on open
+CACHE_DB_SCHEMA_VERSION = 1
+# Bump whenever the emptiness rules change, so results decided under the old
+# rules are no longer served
+CHECK_RULES_VERSION = 3
+_cache_db: sqlite3.Connection | None = None
+_cache_db_disabled = not CACHE_DB_PATH
+_cache_db_lock = threading.Lock()
+
+# Upper bound on files checked concurrently in one invocation
+MAX_CHECK_WORKERS = 8
+
+# Marks the end of a sheet's cells, which may themselves be None
+_END_OF_SHEET = object()
+# Values readers use to pad out rows: None (openpyxl, xlrd) or "" (calamine)
+_PADDING = frozenset((None, ""))
+
+# Decompressed bytes scanned per read when looking for cell values in sheet XML
+SCAN_CHUNK_SIZE = 64 * 1024
+# A <v> (cell value) or <is> (inline string) element, with any namespace prefix
+_VALUE_TAG = re.compile(rb"<(?:\w+:)?(?:v|is)[\s/>]")
+# Decompressed sheet bytes the probe may read before the content hash is taken;
+# files it cannot settle within this go through the result cache
+QUICK_PROBE_BYTES = 64 * 1024
+
+# Work caps for pathological sheets: once a scan has seen this many non-empty
+# cells (row padding does not count), or this many decompressed bytes of sheet
+# XML, without finding data, the sheet is treated as not empty. Emptiness is
+# therefore best-effort within these windows; 0 removes a cap.
+MAX_CELLS = int(os.environ.get("UC03_MAX_CELLS", "1000000"))
+MAX_BYTES_SCANNED = int(os.environ.get("UC03_MAX_BYTES_SCANNED", str(32 * 1024 * 1024)))
+
+
+def _cache_db_connection() -> sqlite3.Connection | None:
+    """Return the on-disk result cache, opening it on first use; None if it is disabled."""
+    global _cache_db, _cache_db_disabled
+    if _cache_db is None and not _cache_db_disabled:
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(CACHE_DB_PATH)), exist_ok=True)
+            conn = sqlite3.connect(CACHE_DB_PATH, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if conn.execute("PRAGMA user_version").fetchone()[0] != CACHE_DB_SCHEMA_VERSION:
+                conn.execute("DROP TABLE IF EXISTS results")
+                conn.execute(f"PRAGMA user_version = {CACHE_DB_SCHEMA_VERSION}")
+            # rules records the rules version and work caps a result was decided
+            # under; rows from other settings are ignored and age out
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "extension TEXT NOT NULL, digest BLOB NOT NULL, size INTEGER NOT NULL, "
+                "rules TEXT NOT NULL, is_empty INTEGER NOT NULL, checked_at INTEGER NOT NULL, "
+                "PRIMARY KEY (extension, digest, size, rules))"
+            )
+            conn.execute("DELETE FROM results WHERE checked_at < ?", (int(time.time()) - CACHE_DB_MAX_AGE,))
+            _cache_db = conn
+        except (sqlite3.Error, OSError) as e:
+            # The cache is an optimisation only; run without it
+            logger.warning(f"Result cache database unavailable: {e}")
+            _cache_db_disabled = True
+    return _cache_db
+
+
+def _cache_db_rules() -> str:
+    """Describe the settings a result depends on, for the on-disk cache key."""
+    return f"{CHECK_RULES_VERSION}:{MAX_CELLS}:{MAX_BYTES_SCANNED}"
+
+
+def _cache_db_get(key: tuple[str, bytes, int]) -> bool | None:
+    """Look a result up in the on-disk cache."""
+    with _cache_db_lock:
+        conn = _cache_db_connection()
+        if conn is None:
+            return None
+        try:
+            row = conn.execute(
+                "SELECT is_empty FROM results WHERE extension = ? AND digest = ? AND size = ? AND rules = ?",
+                (*key, _cache_db_rules())
+            ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Result cache lookup failed: {e}")
+            return None
+    return None if row is None else bool(row[0])
+
+
+def _cache_db_put(key: tuple[str, bytes, int], is_empty: bool) -> None:
+    """Store a result in the on-disk cache."""
+    with _cache_db_lock:
+        conn = _cache_db_connection()
+        if conn is None:
+            return
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                (*key, _cache_db_rules(), int(is_empty), int(time.time()))
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Result cache update failed: {e}")
+
+
+def _local_name(name: str) -> str:
+    """Strip the namespace from an XML tag or attribute name."""
+    return name.rpartition("}")[2]
+
+
+def _is_blank_text(text: str) -> bool:
+    """Check if text is empty or whitespace only, without building a stripped copy."""
+    return not text or text.isspace()
+
+
+def _rich_text(element: ET.Element) -> str:
+    """Return the text of a shared or inline string, leaving out phonetic runs."""
+    parts = []
+    for child in element:
+        name = _local_name(child.tag)
+        if name == "t":
+            parts.append(child.text or "")
+        elif name == "r":
+            parts.extend(t.text or "" for t in child if _local_name(t.tag) == "t")
+    return "".join(parts)
+
+
+class _SharedStrings:
+    """Blank flags of xl/sharedStrings.xml entries, parsed only as far as needed."""
+
+    def __init__(self, archive: zipfile.ZipFile):
+        self._archive = archive
+        self._blank: list[bool] = []
+        self._entries: Iterator[bool] | None = None
+
+    def _iter_blank(self) -> Iterator[bool]:
+        with self._archive.open("xl/sharedStrings.xml") as stream:
+            root = None
+            for event, element in ET.iterparse(stream, events=("start", "end")):
+                if root is None:
+                    root = element
+                elif event == "end" and _local_name(element.tag) == "si":
+                    yield _is_blank_text(_rich_text(element))
+                    root.clear()
+
+    def is_blank(self, index: int) -> bool:
+        if self._entries is None:
+            self._entries = self._iter_blank()
+        while len(self._blank) <= index:
+            # Running past the last entry raises StopIteration
+            self._blank.append(next(self._entries))
+        return self._blank[index]
+
+
+def _cell_has_data(cell: ET.Element, shared_strings: _SharedStrings) -> bool:
+    """Check if a <c> element holds a value that is neither empty nor whitespace."""
+    cell_type = cell.get("t", "n")
+    children = {_local_name(child.tag): child for child in cell}
+    if cell_type == "inlineStr":
+        inline = children.get("is")
+        return inline is not None and not _is_blank_text(_rich_text(inline))
+
+    value = children.get("v")
+    if value is None or not value.text:
+        return False
+    if cell_type == "s":
+        return not shared_strings.is_blank(int(value.text))
+    return not _is_blank_text(value.text)
+
+
+def _first_sheet_path(archive: zipfile.ZipFile) -> str | None:
+    """Return the archive path of the first sheet listed in xl/workbook.xml."""
+    workbook = ET.fromstring(archive.read("xl/workbook.xml"))
+    sheet = next((el for el in workbook.iter() if _local_name(el.tag) == "sheet"), None)
+    if sheet is None:
+        return None
+    rel_id = next((value for key, value in sheet.attrib.items() if _local_name(key) == "id"), None)
+
+    rels = ET.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+    for rel in rels:
+        if rel.get("Id") == rel_id:
+            target = rel.get("Target", "")
+            # Targets are relative to xl/ unless they start with a slash
+            if target.startswith("/"):
+                return target[1:]
+            return posixpath.normpath(posixpath.join("xl", target))
+    return None
+
+
+class _ProbeBudgetExceeded(Exception):
+    """Raised when a size-limited probe reads past its byte budget."""
+
+
+class _LimitedReader:
+    """Read-only stream wrapper that raises once more than max_bytes have been read."""
+
+    def __init__(self, stream: IO[bytes], max_bytes: int | None):
+        self._stream = stream
+        self._remaining = max_bytes
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._stream.read(size)
+        if self._remaining is not None:
+            self._remaining -= len(data)
+            if self._remaining < 0:
+                raise _ProbeBudgetExceeded
+        return data
+
+
+def _has_value_tag(stream: IO[bytes]) -> bool:
+    """Byte-scan sheet XML for any cell value, stopping at the first one."""
+    tail = b""
+    while chunk := stream.read(SCAN_CHUNK_SIZE):
+        # The chunk is searched in place; only the few bytes around the seam
+        # with the previous read are joined, to find a tag split across reads
+        if _VALUE_TAG.search(tail + chunk[:32]) or _VALUE_TAG.search(chunk):
+            return True
+        tail = chunk[-32:]
+    return False
+
+
+def _probe_xlsx_empty(
+    blob: bytes,
+    max_scan_bytes: int | None = None,
+    max_parse_bytes: int | None = None,
+    scan_over_budget: bool | None = None,
+) -> bool | None:
+    """
+    Decide whether the first sheet of an .xlsx file is empty from its XML alone.
+
+    The sheet is byte-scanned for any cell value first, reading at most
+    max_scan_bytes (running out returns scan_over_budget), and then parsed
+    cell by cell, reading at most max_parse_bytes. Returns None when the
+    answer depends on whether row 1 is the standard header, when the file
+    has a layout the probe does not handle, or when the parse runs out of
+    budget; the caller then falls back to a full parse.
+    """
+    try:
+        with zipfile.ZipFile(BytesIO(blob)) as archive:
+            sheet_path = _first_sheet_path(archive)
+            if sheet_path is None or "/worksheets/" not in sheet_path:
+                return None
+
+            # A sheet without a single cell value is empty, whatever its size;
+            # padded sheets of styled blank cells are settled here at C speed
+            with archive.open(sheet_path) as stream:
+                try:
+                    if not _has_value_tag(_LimitedReader(stream, max_scan_bytes)):
+                        return True
+                except _ProbeBudgetExceeded:
+                    return scan_over_budget
+
+            shared_strings = _SharedStrings(archive)
+            row_number = 0
+            header_has_data = False
+            sheet_data = None
+            with archive.open(sheet_path) as stream:
+                events = ET.iterparse(_LimitedReader(stream, max_parse_bytes), events=("start", "end"))
+                for event, element in events:
+                    name = _local_name(element.tag)
+                    if event == "start":
+                        if name == "sheetData":
+                            sheet_data = element
+                        elif name == "row":
+                            row = element.get("r")
+                            row_number = int(row) if row else row_number + 1
+                    elif name == "c":
+                        if _cell_has_data(element, shared_strings):
+                            # Data below row 1 counts whether or not row 1 is the header
+                            if row_number > 1:
+                                return False
+                            header_has_data = True
+                    elif name == "row" and sheet_data is not None:
+                        # Drop finished rows so memory stays flat on long sheets
+                        sheet_data.clear()
+
+            return None if header_has_data else True
+    except _ProbeBudgetExceeded:
+        return None
+    except Exception:
+        # Anything unexpected is left to the full parse
+        return None
+
 
 class Uc03FileCheck(Tool):
     
@@ -64,34 +372,68 @@ class Uc03FileCheck(Tool):
             return
 
         # 3. Check if files are empty
-        for file in file_inputs:
-            if self._is_file_empty(file):
-                error_msg = f"File '{file.filename}' is empty."
-                logger.info(error_msg)
-                yield self.create_text_message(FILE_EMPTY_MSG)
-                yield self.create_variable_message("success", "False")
-                return
+        if len(file_inputs) == 1:
+            empty_file = file_inputs[0] if self._is_file_empty(file_inputs[0]) else None
+        else:
+            empty_file = yield from self._check_files_empty(file_inputs)
+
+        if empty_file is not None:
+            error_msg = f"File '{empty_file.filename}' is empty."
+            logger.info(error_msg)
+            yield self.create_text_message(FILE_EMPTY_MSG)
+            yield self.create_variable_message("success", "False")
+            return
 
         # If all checks pass
         logger.info("All files are valid and not empty.")
         yield self.create_variable_message("success", "True")
     
-    def _validate_file_extensions(self, file_list: list[File], accepted_extensions: list[str]) -> bool:
+    def _check_files_empty(self, file_list: list[File]) -> Generator[ToolInvokeMessage, None, File | None]:
+        """
+        Check several files concurrently and yield their per-file results.
+
+        Most of the cost is downloading each blob, which overlaps well across
+        files. Results are read in input order; once a file is found empty, the
+        checks not yet started are cancelled, and files whose check has not
+        finished are left as None in the list.
+
+        Parameters:
+            file_list: List of File objects.
+
+        Returns:
+            The first empty file in input order, or None if none is empty.
+        """
+        executor = ThreadPoolExecutor(max_workers=min(MAX_CHECK_WORKERS, len(file_list)))
+        try:
+            futures = [executor.submit(self._is_file_empty, file) for file in file_list]
+            empty_file = None
+            for file, future in zip(file_list, futures):
+                if future.result():
+                    empty_file = file
+                    break
+        finally:
+            # Does not wait for checks still running
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        yield self.create_variable_message("check_empty_list", [
+            future.result() if future.done() and not future.cancelled() else None
+            for future in futures
+        ])
+        return empty_file
+
+    def _validate_file_extensions(self, file_list: list[File], accepted_extensions: tuple[str, ...]) -> bool:
         """
         Check if all files in the list have one of the accepted extensions.
         
         Parameters:
             file_list: List of File objects.
-            accepted_extensions: List of allowed file extensions.
+            accepted_extensions: Tuple of allowed lowercase file extensions.
             
         Returns:
             True if all files are valid, False otherwise.
         """
-        for file in file_list:
-            file_extension = file.extension.lower()
-            if not any(file_extension.endswith(ext) for ext in accepted_extensions):
-                return False
-        return True
+        # str.endswith tests every extension of a tuple in a single call
+        return all((file.extension or "").lower().endswith(accepted_extensions) for file in file_list)
     
     def _is_file_empty(self, file: File) -> bool:
         """
@@ -106,114 +448,160 @@ class Uc03FileCheck(Tool):
         file_extension = (file.extension or "").lower()
         blob = file.blob
 
-        try:
-            is_standard_header = False
-
-            if file_extension == ".xlsx":
-                workbook = openpyxl.load_workbook(
-                    filename=BytesIO(blob),
-                    read_only=True,
-                    data_only=True,
-                )
-                
-                if workbook.worksheets:
-                    worksheet = workbook.worksheets[0]
-                    
-                    # Get first row as header
-                    first_row = next(worksheet.iter_rows(values_only=True), None)
-                    if first_row:
-                        is_standard_header = self._is_standard_header(list(first_row))
-                
-                # Check if empty
-                return self._check_xlsx_empty(blob, is_standard_header)
-
-            elif file_extension == ".xls":
-                book = xlrd.open_workbook(file_contents=blob)
-                
-                if book.nsheets > 0:
-                    sheet = book.sheet_by_index(0)
-                    
-                    # Get first row as header
-                    if sheet.nrows > 0:
-                        first_row = [sheet.cell_value(0, col_index) for col_index in range(sheet.ncols)]
-                        is_standard_header = self._is_standard_header(first_row)
-                
-                # Check if empty
-                return self._check_xls_empty(blob, is_standard_header)
+        # Files settled within the first few KiB of sheet XML are answered
+        # before paying for the content hash the caches need
+        if file_extension == ".xlsx":
+            is_empty = _probe_xlsx_empty(blob, QUICK_PROBE_BYTES, QUICK_PROBE_BYTES)
+            if is_empty is not None:
+                return is_empty
 
-            return False
-        except Exception as e:
-            logger.error(f"Error checking file empty: {e}")
-            return False
+        # Re-uploads of the same attachment are answered from the cache
+        key = (file_extension, hashlib.blake2b(blob, digest_size=16).digest(), len(blob))
+        with _result_cache_lock:
+            if key in _result_cache:
+                _result_cache.move_to_end(key)
+                return _result_cache[key]
+
+        # Then from the on-disk cache, which outlives the process
+        is_empty = _cache_db_get(key)
+        if is_empty is None:
+            try:
+                is_empty = self._check_empty(blob, file_extension)
+            except Exception as e:
+                # Read errors are not cached
+                logger.error(f"Error checking file empty: {e}")
+                return False
+            _cache_db_put(key, is_empty)
+
+        with _result_cache_lock:
+            _result_cache[key] = is_empty
+            while len(_result_cache) > RESULT_CACHE_SIZE:
+                _result_cache.popitem(last=False)
+        return is_empty
+
+    def _check_empty(self, blob: bytes, file_extension: str) -> bool:
+        """Check if the workbook in blob is empty, using the fastest available reader."""
+        if file_extension == ".xlsx":
+            # Most files are settled from the sheet XML without a full parse.
+            # The byte scan beats every reader on padded blank sheets, but the
+            # cell-by-cell pass is Python and loses to calamine on long sheets,
+            # so it stays bounded when calamine can take over.
+            parse_limit = QUICK_PROBE_BYTES if CalamineWorkbook is not None else None
+            is_empty = _probe_xlsx_empty(
+                blob, MAX_BYTES_SCANNED or None, parse_limit, scan_over_budget=False
+            )
+            if is_empty is not None:
+                return is_empty
+
+        if file_extension in (".xlsx", ".xls") and CalamineWorkbook is not None:
+            return self._check_calamine_empty(blob)
 
-    def _is_standard_header(self, header_row: list) -> bool:
+        if file_extension == ".xlsx":
+            return self._check_xlsx_empty(blob)
+
+        elif file_extension == ".xls":
+            return self._check_xls_empty(blob)
+
+        return False
+
+    def _is_standard_header(self, header_row: Sequence[Any]) -> bool:
         """Check if the header row matches the standard header."""
-        if not header_row or len(header_row) != len(STANDARD_HEADER):
+        if len(header_row) != len(STANDARD_HEADER):
             return False
-        
-        # Convert to string and strip whitespace for comparison
-        header_str = [str(h).strip() if h is not None else "" for h in header_row]
-        return header_str == STANDARD_HEADER
 
-    def _check_xlsx_empty(self, blob: bytes, is_standard_header: bool) -> bool:
-        """Check if XLSX file is empty based on file type."""
+        # Convert to string and strip whitespace for comparison, stopping at
+        # the first column that differs (usually the first one)
+        return all(
+            ("" if h is None else str(h).strip()) == expected
+            for h, expected in zip(header_row, STANDARD_HEADER)
+        )
+
+    def _check_rows_empty(self, rows: Iterator[Sequence[Any]]) -> bool:
+        """Check if the rows of a sheet contain no data, reading them in a single pass."""
+        first_row = next(rows, None)
+        if first_row is None:
+            return True
+
+        # Readers pad row 1 differently (calamine out to the used range,
+        # openpyxl and xlrd only as far as its own last cell), so the header
+        # is judged without trailing padding and every reader agrees
+        header_row = list(first_row)
+        while header_row and header_row[-1] in _PADDING:
+            header_row.pop()
+
+        # Type 1 (standard header): skip row 1 (header), check from row 2
+        # Type 2 (free format): check all rows starting from row 1
+        if not self._is_standard_header(header_row):
+            rows = chain([first_row], rows)
+
+        # Padding is dropped before the cell budget applies, so a wide used
+        # range of empty cells does not use it up; readers differ in how much
+        # they pad, and only cells with a value count
+        cells = filterfalse(_PADDING.__contains__, chain.from_iterable(rows))
+        scanned = islice(cells, MAX_CELLS) if MAX_CELLS else cells
+
+        # Stop at the first cell that is not blank; one any() over all cells
+        # keeps the loop in C. isspace() answers without allocating, unlike
+        # comparing strip() to "".
+        if any(
+            not isinstance(cell_value, str) or not cell_value.isspace()
+            for cell_value in scanned
+        ):
+            return False
+
+        # Cells left over mean the cell budget ran out first: treat as not empty
+        return next(cells, _END_OF_SHEET) is _END_OF_SHEET
+
+    def _check_calamine_empty(self, blob: bytes) -> bool:
+        """Check if XLSX or XLS file is empty with calamine."""
+        with CalamineWorkbook.from_filelike(BytesIO(blob)) as workbook:
+            # Only check the first sheet; empty cells are ''
+            sheet = workbook.get_sheet_by_index(0)
+            rows = sheet.iter_rows()
+            # Rows start at row 1 but at the first used column, not column A;
+            # pad the first row back out to A so the header check sees the
+            # same cells as openpyxl and xlrd do
+            if sheet.start is not None and sheet.start[1]:
+                first_row = next(rows, None)
+                if first_row is not None:
+                    rows = chain([[""] * sheet.start[1] + first_row], rows)
+            return self._check_rows_empty(rows)
+
+    def _check_xlsx_empty(self, blob: bytes) -> bool:
+        """Check if XLSX file is empty with openpyxl."""
+        import openpyxl
+
         workbook = openpyxl.load_workbook(
             filename=BytesIO(blob),
             read_only=True,
             data_only=True,
         )
-        
-        # Only check the first sheet
-        worksheet = workbook.worksheets[0]
-        
-        # Determine starting row based on file type
-        # Type 1 (standard header): skip row 1 (header), check from row 2
-        # Type 2 (free format): check all rows starting from row 1
-        start_row = 2 if is_standard_header else 1
-        
-        for row_idx, row in enumerate(worksheet.iter_rows(values_only=True), start=1):
-            # Skip rows before start_row
-            if row_idx < start_row:
-                continue
-            
-            for cell_value in row:
-                if cell_value is None:
-                    continue
-                if isinstance(cell_value, str) and cell_value.strip() == "":
-                    continue
-                # Found data
-                return False
-        
-        # No data found
-        return True
 
-    def _check_xls_empty(self, blob: bytes, is_standard_header: bool) -> bool:
-        """Check if XLS file is empty based on file type."""
-        book = xlrd.open_workbook(file_contents=blob)
-        
-        # Only check the first sheet
-        sheet = book.sheet_by_index(0)
-        
-        # Determine starting row based on file type
-        # Type 1 (standard header): skip row 1 (header), check from row 2
-        # Type 2 (free format): check all rows starting from row 1
-        start_row = 2 if is_standard_header else 1
-        
-        for row_index in range(sheet.nrows):
-            # Skip rows before start_row (0-indexed, so start_row-1)
-            if row_index < start_row - 1:
-                continue
-            
-            for col_index in range(sheet.ncols):
-                cell_value = sheet.cell_value(row_index, col_index)
-                if cell_value is None:
-                    continue
-                if isinstance(cell_value, str) and cell_value.strip() == "":
-                    continue
-                # Found data
-                return False
-        
-        # No data found
-        return True
+        # Read-only workbooks keep the archive open until closed
+        with closing(workbook):
+            # Only check the first sheet
+            worksheet = workbook.worksheets[0]
+            # The stored dimension is often inflated (e.g. A1:Z100000 on a sheet that
+            # was once formatted); ignore it so rows are not padded out to that size
+            worksheet.reset_dimensions()
+            return self._check_rows_empty(worksheet.iter_rows(values_only=True))
+
+    def _check_xls_empty(self, blob: bytes) -> bool:
+        """Check if XLS file is empty with xlrd."""
+        import xlrd
+
+        # on_demand parses only the sheets asked for, and ragged_rows stops
+        # every row being padded out to the widest one
+        # Leaving the block calls release_resources()
+        with xlrd.open_workbook(file_contents=blob, on_demand=True, ragged_rows=True) as book:
+            # Only check the first sheet
+            sheet = book.sheet_by_index(0)
+            # row_values() returns a slice copy of xlrd's internal row list;
+            # read those lists directly, falling back if the private attribute
+            # ever goes away
+            rows = getattr(sheet, "_cell_values", None)
+            if rows is None:
+                rows = (sheet.row_values(row_index) for row_index in range(sheet.nrows))
+            return self._check_rows_empty(iter(rows))
 
 